@@ -18,6 +18,11 @@ setup(
     author_email="awolverp@gmail.com",
     url="https://github.com/awolverp/xuiclient",
     packages=['xuiclient'],
+    extras_require={
+        # optional faster JSON; pure stdlib json is used without them
+        "speedups": ["orjson"],
+        "simdjson": ["pysimdjson"],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "Programming Language :: Python :: Implementation :: PyPy",
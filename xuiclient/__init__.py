@@ -5,7 +5,8 @@ from .client import (
     NidukaAkalankaClient,
     MHSanaeiClient,
     Alireza0Client,
-    LoginError
+    LoginError,
+    get_connector
 )
 
 __version__ = "2.1.0"
@@ -1,13 +1,17 @@
 """
 Vaxilu (v1) -> NidukaAkalanka (v2) ->
 """
-from http.cookies import SimpleCookie
 import aiohttp
 import asyncio
+import yarl
 import typing
 import json
+import weakref
+import functools
+import os
 
 from . import types, inbounds
+from .inbounds import _dumps, _loads
 
 class LoginError(Exception):
     pass
@@ -15,33 +19,77 @@ class LoginError(Exception):
 class UnknownError(Exception):
     pass
 
-class _GetCookies:
-    def __init__(self) -> None:
-        self.obj = {} # type: dict[str, str]
-    
-    def load(self, __iter: SimpleCookie[str]):
-        for k,v in __iter.items():
-            self.obj[k] = v.value
-    
-    def __dict__(self):
-        return self.obj
+def get_connector(
+    ssl: bool = False,
+    limit: int = 100,
+    limit_per_host: int = 64,
+    keepalive_timeout: float = 75,
+) -> aiohttp.TCPConnector:
+    """
+    Creates a connector which can be shared between clients.
+
+    Pass it as `connector` to clients to make them share one connection pool,
+    e.g. in a service that manages many panels. `limit` is the pool size, and
+    raising it (together with `limit_per_host`) allows more concurrent requests.
+
+    - Must be called inside a running event loop (raises `RuntimeError` otherwise);
+      the connector can only be used on that loop.
+
+    - The caller owns the connector: clients don't close a connector they didn't
+      create, so `await connector.close()` after closing them.
+    """
+    return aiohttp.TCPConnector(
+        ssl=ssl, limit=limit, limit_per_host=limit_per_host,
+        keepalive_timeout=keepalive_timeout, use_dns_cache=True, ttl_dns_cache=60
+    )
+
+def _ensure(data: dict) -> None:
+    if not data.get("success", False):
+        raise UnknownError(data.get("msg", "").strip())
+
+@functools.lru_cache(maxsize=512)
+def _format_url(template: str, args: tuple) -> yarl.URL:
+    return yarl.URL(template % args)
+
+def _close_session(
+    session: aiohttp.ClientSession, loop: typing.Optional[asyncio.AbstractEventLoop]
+) -> None:
+    if loop is None or loop.is_closed() or session.closed:
+        return
+
+    if loop.is_running():
+        # may be called from GC in any thread; never re-enter a running loop
+        loop.call_soon_threadsafe(loop.create_task, session.close())
+    elif asyncio._get_running_loop() is None:
+        loop.run_until_complete(session.close())
+    else:
+        # collected inside another running loop, which can't block on this one;
+        # don't close, just release the connector
+        session.detach()
 
 def _load_cookies(filename: str) -> dict:
+    # common first-run case: check instead of raising FileNotFoundError
+    if not os.path.isfile(filename):
+        return {}
+
     try:
-        with open(filename, "r") as f:
+        with open(filename, "r", encoding="utf-8") as f:
             data = f.read()
-        
-        return dict(i.split(":", 2) for i in data.splitlines())
     except FileNotFoundError:
+        # removed meanwhile
         return {}
 
+    try:
+        cookies = json.loads(data)
+    except ValueError:
+        # "name:value" lines written by older versions; saved as JSON next time
+        return dict(i.split(":", 1) for i in data.splitlines() if ":" in i)
+
+    return cookies if isinstance(cookies, dict) else {}
+
 def _save_cookies(obj: dict, filename: str) -> None:
-    with open(filename, "w") as f:
-        f.write(
-            "\n".join(
-                f"{k}:{v}" for k,v in obj.items()
-            )
-        )
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(obj, f)
 
 class VaxiluClient:
     """
@@ -66,13 +114,22 @@ class VaxiluClient:
         cookie_file: typing.Optional[str] = None,
         timeout: float = 20,
         loop: typing.Optional[asyncio.AbstractEventLoop] = None,
+        connector: typing.Optional[aiohttp.BaseConnector] = None,
         **kwargs
     ) -> None:
+        kwargs.setdefault("json_serialize", _dumps)
+        kwargs.setdefault("cookie_jar", aiohttp.CookieJar(unsafe=True))
+
+        if connector is None:
+            connector = aiohttp.TCPConnector(
+                ssl=False, use_dns_cache=True, ttl_dns_cache=60, limit_per_host=64
+            )
+        else:
+            kwargs.setdefault("connector_owner", False)
+
         self.session = aiohttp.ClientSession(
             base_url=server_url,
-            connector=aiohttp.TCPConnector(
-                ssl=False, use_dns_cache=True, ttl_dns_cache=60
-            ),
+            connector=connector,
             timeout=aiohttp.ClientTimeout( # type: ignore
                 total=timeout
             ),
@@ -83,10 +140,19 @@ class VaxiluClient:
         
         if cookie_file:
             self.cookies = _load_cookies(cookie_file)
+            self.session.cookie_jar.update_cookies(self.cookies)
         else:
             self.cookies = {}
 
         self.loop = loop
+        self._finalizer = weakref.finalize(self, _close_session, self.session, loop)
+
+        # split once here, so requests don't unpack _VERSION_URLS tuples;
+        # fixed paths are parsed into yarl.URL once instead of on every request
+        self._methods = {k: v[0] for k, v in self._VERSION_URLS.items()}
+        self._urls = {
+            k: (v[1] if "%" in v[1] else yarl.URL(v[1])) for k, v in self._VERSION_URLS.items()
+        } # type: dict[str, typing.Union[str, yarl.URL]]
 
     @property
     def server_url(self) -> str:
@@ -104,12 +170,15 @@ class VaxiluClient:
         params: typing.Optional[dict] = None,
         json: typing.Optional[dict] = None,
         allow_redirects: bool = False,
-        cookiejar: typing.Optional[_GetCookies] = None
+        cookiejar: typing.Optional[typing.Dict[str, str]] = None
     ) -> typing.Any:
-        method, url = self._VERSION_URLS[urlkey]
+        url = self._urls[urlkey]
+        if urlargs:
+            url = _format_url(url, urlargs) # type: ignore
+
         async with self.session.request(
-            method, url % urlargs, params=params, json=json,
-            allow_redirects=allow_redirects, cookies=self.cookies
+            self._methods[urlkey], url, params=params, json=json,
+            allow_redirects=allow_redirects
         ) as response:
             response.raise_for_status()
 
@@ -117,10 +186,12 @@ class VaxiluClient:
             if (310 > response.status >= 300) and response.headers["Location"] == "/":
                 raise LoginError("login first")
 
-            if cookiejar:
-                cookiejar.load(response.cookies)
+            if cookiejar is not None:
+                for k, v in response.cookies.items():
+                    cookiejar[k] = v.value
 
-            return await response.json()
+            # decode raw bytes directly; skips aiohttp's charset detection
+            return _loads(await response.read())
 
     async def login(self, username: str, password: str) -> None:
         """
@@ -133,7 +204,7 @@ class VaxiluClient:
         if self.loggined:
             return
         
-        c = _GetCookies()
+        c = {} # type: dict[str, str]
 
         data: dict = await self._send_request("login", json={"username": username, "password": password}, cookiejar=c)
         if not data.get("success", False):
@@ -141,8 +212,8 @@ class VaxiluClient:
                 f"cannot login - check your username and password: {username}/{password}"
             )
         
-        # save cookies
-        self.cookies = c.__dict__()
+        # the session's cookie jar has already stored them
+        self.cookies = c
         if self.cookie_file:
             _save_cookies(self.cookies, self.cookie_file)
 
@@ -165,95 +236,115 @@ class VaxiluClient:
             raise ValueError("logout failed!")
 
         self.cookies.clear()
+        self.session.cookie_jar.clear()
         if self.cookie_file:
             _save_cookies(self.cookies, self.cookie_file)
 
     async def get_server_status(self) -> types.ServerStatusResponse:
         data: dict = await self._send_request("get_status")
-        if not data.get("success", False):
-            raise UnknownError(data.get("msg", "").strip())
+        _ensure(data)
 
         return types.ServerStatusResponse(**data["obj"])
 
     async def get_settings(self) -> types.SettingsResponse:
         data: dict = await self._send_request("get_settings")
-        if not data.get("success", False):
-            raise UnknownError(data.get("msg", "").strip())
+        _ensure(data)
 
         return types.SettingsResponse(**data["obj"])
 
     async def restart_panel(self) -> None:
         data: dict = await self._send_request("restart_panel")
-        if not data.get("success", False):
-            raise UnknownError(data.get("msg", "").strip())
+        _ensure(data)
 
-    async def get_inbounds_list(self) -> typing.AsyncGenerator[inbounds.Inbound, None]:
+    async def get_inbounds_list(self) -> typing.List[inbounds.Inbound]:
         data: dict = await self._send_request("get_inbounds_list")
-        if not data.get("success", False):
-            raise UnknownError(data.get("msg", "").strip())
-    
-        for i in data["obj"]:
-            yield inbounds.Inbound(**i)
+        _ensure(data)
+
+        return [inbounds.Inbound(**i) for i in data["obj"]]
+
+    async def snapshot(
+        self
+    ) -> typing.Tuple[types.ServerStatusResponse, types.SettingsResponse, typing.List[inbounds.Inbound]]:
+        """
+        Returns server status, settings and inbounds list.
+
+        - Requests are sent concurrently, so it's faster than calling them one by one.
+        """
+        status, settings, inbound_list = await asyncio.gather(
+            self.get_server_status(), self.get_settings(), self.get_inbounds_list()
+        )
+        return status, settings, inbound_list
+
+    async def _add_inbound_raw(self, body: dict) -> None:
+        data: dict = await self._send_request("add_inbound", json=body)
+        _ensure(data)
 
     async def add_inbound(self, obj: inbounds.Inbound) -> None:
-        data: dict = await self._send_request("add_inbound", json=inbounds._cast_to_dict(obj))
-        if not data.get("success", False):
-            raise UnknownError(data.get("msg", "").strip())
+        await self._add_inbound_raw(inbounds._cast_to_dict(obj))
     
+    async def add_inbounds_many(self, *objs: inbounds.Inbound) -> None:
+        """
+        Adds all inbounds concurrently.
+
+        - Raises the first error if any of them failed.
+        """
+        # an object passed several times (e.g. a template) is serialized once
+        bodies = {id(i): inbounds._cast_to_dict(i) for i in objs}
+        await asyncio.gather(*(self._add_inbound_raw(bodies[id(i)]) for i in objs))
+
     async def update_inbound(self, inbound_id: int, new_inbound: inbounds.Inbound) -> None:
         data: dict = await self._send_request(
             "update_inbound", (inbound_id,),
             json=inbounds._cast_to_dict(new_inbound)
         )
-        if not data.get("success", False):
-            raise UnknownError(data.get("msg", "").strip())
+        _ensure(data)
 
     async def delete_inbound(self, inbound_id: int) -> None:
         data: dict = await self._send_request("delete_inbound", (inbound_id,))
-        if not data.get("success", False):
-            raise UnknownError(data.get("msg", "").strip())
+        _ensure(data)
 
     async def close(self):
+        # closed explicitly; drop the finalizer's references to the session and loop
+        self._finalizer.detach()
         await self.session.close()
 
-    def __del__(self) -> None:
-        if self.loop and not self.session.closed:
-            self.loop.run_until_complete(self.session.close())
+if typing.TYPE_CHECKING:
+    # lets type checkers see the VaxiluClient attributes the mixin uses
+    _InboundQueriesBase = VaxiluClient
+else:
+    _InboundQueriesBase = object
+
+class _InboundQueriesMixin(_InboundQueriesBase):
+    """
+    Inbound queries shared by NidukaAkalanka and MHSanaei; the subclass's
+    `_VERSION_URLS` provides the routes.
+    """
 
-class NidukaAkalankaClient(VaxiluClient):
-    def __init__(
-        self,
-        server_url: str,
-        cookie_file: typing.Optional[str] = None,
-        timeout: float = 20,
-        loop: typing.Optional[asyncio.AbstractEventLoop] = None,
-        **kwargs
-    ) -> None:
-        super().__init__(server_url, cookie_file, timeout, loop, **kwargs)
-        self._VERSION_URLS["get_inbound"] = ("GET", "/xui/API/inbounds/get/%d")
-        self._VERSION_URLS["get_client_ips"] = ("POST", "/xui/inbound/clientIps/%s")
-        self._VERSION_URLS["clear_client_ips"] = ("POST", "/xui/inbound/clearClientIps/%s")
-    
     async def get_inbound(self, inbound_id: int) -> inbounds.Inbound:
         data: dict = await self._send_request("get_inbound", (inbound_id,))
-        if not data.get("success", False):
-            raise UnknownError(data.get("msg", "").strip())
+        _ensure(data)
 
         return inbounds.Inbound(**data["obj"])
     
     async def get_client_ips(self, email: str) -> typing.List[str]:
         data: dict = await self._send_request("get_client_ips", (email,))
-        if not data.get("success", False):
-            raise UnknownError(data.get("msg", "").strip())
+        _ensure(data)
 
-        return data["obj"] if isinstance(data, list) else []
+        return data["obj"] if isinstance(data["obj"], list) else []
 
     async def clear_client_ips(self, email: str) -> None:
         data: dict = await self._send_request("clear_client_ips", (email,))
-        if not data.get("success", False):
-            raise UnknownError(data.get("msg", "").strip())
+        _ensure(data)
+
+class NidukaAkalankaClient(_InboundQueriesMixin, VaxiluClient):
+    _VERSION_URLS = {
+        **VaxiluClient._VERSION_URLS,
+        "get_inbound": ("GET", "/xui/API/inbounds/get/%d"),
+        "get_client_ips": ("POST", "/xui/inbound/clientIps/%s"),
+        "clear_client_ips": ("POST", "/xui/inbound/clearClientIps/%s"),
+    }
 
-class MHSanaeiClient(VaxiluClient):
+class MHSanaeiClient(_InboundQueriesMixin, VaxiluClient):
     # TODO: add get_server_db
     # TODO: add import_server_db
     # TODO: add get_new_x25519cert
@@ -291,43 +382,21 @@ class MHSanaeiClient(VaxiluClient):
 
     async def get_server_log(self, limit: int = 1000) -> typing.List[str]:
         data: dict = await self._send_request("get_server_log", (limit,))
-        if not data.get("success", False):
-            raise UnknownError(data.get("msg", "").strip())
+        _ensure(data)
 
         return data["obj"]
 
     async def get_server_config(self) -> typing.Dict[str, typing.Any]:
         data: dict = await self._send_request("get_server_config")
-        if not data.get("success", False):
-            raise UnknownError(data.get("msg", "").strip())
+        _ensure(data)
 
         return data["obj"]
 
-    async def get_inbound(self, inbound_id: int) -> inbounds.Inbound:
-        data: dict = await self._send_request("get_inbound", (inbound_id,))
-        if not data.get("success", False):
-            raise UnknownError(data.get("msg", "").strip())
-
-        return inbounds.Inbound(**data["obj"])
-
     async def get_client_traffics(self, email: str) -> inbounds.ClientStat:
         data: dict = await self._send_request("get_client_traffics", (email,))
-        if not data.get("success", False):
-            raise UnknownError(data.get("msg", "").strip())
-
-        return inbounds.ClientStat(**data["obj"])
-
-    async def get_client_ips(self, email: str) -> typing.List[str]:
-        data: dict = await self._send_request("get_client_ips", (email,))
-        if not data.get("success", False):
-            raise UnknownError(data.get("msg", "").strip())
-
-        return data["obj"] if isinstance(data, list) else []
+        _ensure(data)
 
-    async def clear_client_ips(self, email: str) -> None:
-        data: dict = await self._send_request("clear_client_ips", (email,))
-        if not data.get("success", False):
-            raise UnknownError(data.get("msg", "").strip())
+        return inbounds.ClientStat._from_dict(data["obj"])
 
     async def add_inbound_client(
         self,
@@ -339,16 +408,14 @@ class MHSanaeiClient(VaxiluClient):
 
         jsondata = {
             "id": inbound_id,
-            "settings": json.dumps({"clients": [inbounds._asdict_inner(c, dict, True) for c in _cli]})
+            "settings": _dumps({"clients": [inbounds._asdict_inner(c, dict, True) for c in _cli]})
         }
         data: dict = await self._send_request("add_inbound_client", json=jsondata)
-        if not data.get("success", False):
-            raise UnknownError(data.get("msg", "").strip())
+        _ensure(data)
 
     async def delete_inbound_client(self, inbound_id: int, client_id: str) -> None:
         data: dict = await self._send_request("delete_inbound_client", (inbound_id, client_id))
-        if not data.get("success", False):
-            raise UnknownError(data.get("msg", "").strip())
+        _ensure(data)
 
     async def update_inbound_client(
         self,
@@ -358,21 +425,18 @@ class MHSanaeiClient(VaxiluClient):
     ) -> None:
         jsondata = {
             "id": inbound_id,
-            "settings": json.dumps({"clients": [inbounds._asdict_inner(_cli, dict, True)]})
+            "settings": _dumps({"clients": [inbounds._asdict_inner(_cli, dict, True)]})
         }
         data: dict = await self._send_request("update_inbound_client", (client_id,), json=jsondata)
-        if not data.get("success", False):
-            raise UnknownError(data.get("msg", "").strip())
+        _ensure(data)
         
     async def reset_client_traffic(self, inbound_id: int, email: str) -> None:
         data: dict = await self._send_request("delete_client_traffic", (inbound_id, email))
-        if not data.get("success", False):
-            raise UnknownError(data.get("msg", "").strip())
+        _ensure(data)
 
     async def delete_depleted_clients(self, inbound_id: int) -> None:
         data: dict = await self._send_request("delete_depleted_clients", (inbound_id,))
-        if not data.get("success", False):
-            raise UnknownError(data.get("msg", "").strip())
+        _ensure(data)
 
 class Alireza0Client(MHSanaeiClient):
 
@@ -1,21 +1,66 @@
-from urllib.parse import urlencode, quote
+from urllib.parse import quote, quote_plus
 import dataclasses
 import typing
-import json
+import sys
+import string
+import functools
 import copy
-import uuid
+from uuid import uuid4
+from array import array
 import base64
 
-MISSING = type("MISSING", (object,), {})
+from .types import _SLOTS
+
+try:
+    import orjson
+
+    def _dumps(obj: typing.Any) -> str:
+        return orjson.dumps(obj).decode()
+
+    _dumpb = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    import json as _json
+
+    # one shared encoder instead of a new one per call; compact and non-ascii
+    # left as-is, like orjson - these strings are nested inside request bodies
+    _dumps = _json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+
+    def _dumpb(obj: typing.Any) -> bytes:
+        return _dumps(obj).encode()
+
+    try:
+        from simdjson import loads as _loads
+    except ImportError:
+        from json import loads as _loads
+
+class _MissingType:
+    """
+    Type of the `MISSING` sentinel - marks fields that the panel did not send.
+    """
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "MISSING"
+
+    def __reduce__(self) -> str:
+        # copy, deepcopy and pickle return the singleton itself
+        return "MISSING"
+
+MISSING = _MissingType()
+
+def _new_client_id() -> str:
+    # xray expects the canonical (dashed) uuid form, so .hex is not an option
+    return str(uuid4())
 
 _SupportedProtocols = typing.Literal[
     "vmess", "vless", "trojan", "shadowsocks", "dokodemo-door", "http", "socks"
 ]
 
 # VMess Protocol
-@dataclasses.dataclass()
+@dataclasses.dataclass(**_SLOTS)
 class VMessClient:
-    id: str = dataclasses.field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = dataclasses.field(default_factory=_new_client_id)
     """ VMess protocol client ID (UUID) """
 
     alterId: int = 0
@@ -43,10 +88,12 @@ class VMessClient:
     """ Vaxilu and NidukaAkalanka not supported """
 
     def __post_init__(self):
-        if isinstance(self.expiryTime, str):
-            self.expiryTime = int(self.expiryTime or '0')
+        # panels send an int; only some versions send a (possibly empty) string
+        expiry = self.expiryTime
+        if expiry.__class__ is str:
+            self.expiryTime = int(expiry or '0')
 
-@dataclasses.dataclass()
+@dataclasses.dataclass(**_SLOTS)
 class VMessSettings:
     clients: typing.List[VMessClient]
     """ VMess clients """
@@ -75,9 +122,9 @@ class VLessFallback(typing.TypedDict):
     xver: int
     """ fallback xversion """
 
-@dataclasses.dataclass()
+@dataclasses.dataclass(**_SLOTS)
 class VLessClient:
-    id: str = dataclasses.field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = dataclasses.field(default_factory=_new_client_id)
     """ VLess protocol client ID (UUID) """
 
     flow: typing.Literal["xtls-rprx-direct", "xtls-rprx-origin", ""] = ""
@@ -105,10 +152,12 @@ class VLessClient:
     """ Vaxilu and NidukaAkalanka not supported """
 
     def __post_init__(self):
-        if isinstance(self.expiryTime, str):
-            self.expiryTime = int(self.expiryTime or '0')
+        # panels send an int; only some versions send a (possibly empty) string
+        expiry = self.expiryTime
+        if expiry.__class__ is str:
+            self.expiryTime = int(expiry or '0')
 
-@dataclasses.dataclass()
+@dataclasses.dataclass(**_SLOTS)
 class VLessSettings:
     clients: typing.List[VLessClient]
     """ VLess clients """
@@ -124,9 +173,9 @@ class VLessSettings:
             self.clients = [VLessClient(**i) for i in self.clients] # type: ignore
 
 # Trojan Protocol
-class TrojanFallback(VLessFallback): pass
+TrojanFallback = VLessFallback
 
-@dataclasses.dataclass()
+@dataclasses.dataclass(**_SLOTS)
 class TrojanClient:
     password: str
     """ client password for connecting """
@@ -155,7 +204,7 @@ class TrojanClient:
     subId: str = dataclasses.field(default=MISSING, compare=False)
     """ Vaxilu and NidukaAkalanka not supported """
 
-@dataclasses.dataclass()
+@dataclasses.dataclass(**_SLOTS)
 class TrojanSettings:
     clients: typing.List[TrojanClient]
     """ Trojan clients """
@@ -168,7 +217,7 @@ class TrojanSettings:
             self.clients = [TrojanClient(**i) for i in self.clients] # type: ignore
 
 # Shadowsocks Protocol
-@dataclasses.dataclass()
+@dataclasses.dataclass(**_SLOTS)
 class ShadowsocksClient:
     password: str
     """ It is same with default inbound password """
@@ -181,7 +230,7 @@ class ShadowsocksClient:
     tgId: str
     subId: str
 
-@dataclasses.dataclass()
+@dataclasses.dataclass(**_SLOTS)
 class ShadowsocksSettings:
     password: str
     """ Password """
@@ -196,16 +245,17 @@ class ShadowsocksSettings:
     """ Vaxilu not supported """
 
     def __post_init__(self):
-        if self.clients and self.clients is not MISSING and isinstance(self.clients[0], dict):
-            self.clients = [ShadowsocksClient(**i) for i in self.clients] # type: ignore
+        clients = self.clients
+        if clients is not MISSING and clients and isinstance(clients[0], dict):
+            self.clients = [ShadowsocksClient(**i) for i in clients] # type: ignore
 
 # Dokodemo-door Protocol
-@dataclasses.dataclass()
+@dataclasses.dataclass(**_SLOTS)
 class DokodemoDoorSettings:
-    address: typing.Union[str, typing.Type[MISSING]] = MISSING
+    address: typing.Union[str, _MissingType] = MISSING
     """ Destination address - you can ignore this parameter. """
 
-    port: typing.Union[str, typing.Type[MISSING]] = MISSING
+    port: typing.Union[str, _MissingType] = MISSING
     """ Destination port - you can ignore this parameter. """
 
     network: typing.Literal["tcp", "udp", "tcp,udp"] = "tcp,udp"
@@ -217,7 +267,7 @@ class DokodemoDoorSettings:
 # Socks Protocol
 _PAccount = typing.TypedDict("_PAccount", {"user": str, "pass": str})
 
-@dataclasses.dataclass()
+@dataclasses.dataclass(**_SLOTS)
 class SocksSettings:
     auth: typing.Literal["password", "noauth"]
     """ set `password` if there is any password, otherwise `noauth` """
@@ -232,7 +282,7 @@ class SocksSettings:
     """ if UDP enabled, the UDP address is where? """
 
 # HTTP Protocol
-@dataclasses.dataclass()
+@dataclasses.dataclass(**_SLOTS)
 class HTTPSettings:
     accounts: typing.List[_PAccount]
     """ Accounts """
@@ -242,13 +292,13 @@ _ProtocolSettings = typing.Union[
     DokodemoDoorSettings, SocksSettings, HTTPSettings,
     TrojanSettings
 ]
-_PROTOCOLS = {
+_PROTOCOLS: typing.Dict[str, typing.Type[_ProtocolSettings]] = {
     "vmess": VMessSettings, "vless": VLessSettings, "shadowsocks": ShadowsocksSettings,
     "dokodemo-door": DokodemoDoorSettings, "socks": SocksSettings,
     "http": HTTPSettings, "trojan": TrojanSettings
 }
 
-@dataclasses.dataclass()
+@dataclasses.dataclass(**_SLOTS)
 class SniffingSettings:
     enabled: bool = True
     """ sniffing is enabled or not """
@@ -261,14 +311,21 @@ class TlsCertificate(typing.TypedDict):
     certificateFile: str
     keyFile: str
 
-@dataclasses.dataclass()
+@dataclasses.dataclass(**_SLOTS)
 class TlsStreamSettingsInfo:
     allowInsecure: bool = False
     fingerprint: str = ""
     serverName: str = ""
     domains: typing.List[str] = dataclasses.field(default_factory=list)
 
-@dataclasses.dataclass()
+_EMPTY_TLS_INFO = TlsStreamSettingsInfo()
+""" stands in for a missing `TlsStreamSettings.settings` when building links - never mutate it """
+
+def _tls_info(tls: "TlsStreamSettings") -> TlsStreamSettingsInfo:
+    info = tls.settings
+    return info if info.__class__ is TlsStreamSettingsInfo else _EMPTY_TLS_INFO
+
+@dataclasses.dataclass(**_SLOTS)
 class TlsStreamSettings:
     serverName: str
     """ tls server name """
@@ -310,7 +367,7 @@ class TcpHTTPResponse(typing.TypedDict):
     reason: str
     headers: typing.Dict[str, typing.List[str]]
 
-@dataclasses.dataclass()
+@dataclasses.dataclass(**_SLOTS)
 class TcpHeader:
     type: typing.Literal["none", "http"] = "none"
     """ set `http` if you want, else `none` """
@@ -322,6 +379,9 @@ class TcpHeader:
     """ if you set type to `http`, you can specify the response info """
 
     def __post_init__(self):
+        if isinstance(self.type, str):
+            self.type = sys.intern(self.type)
+
         if self.type == "http":
             if self.request is MISSING:
                 self.request = TcpHTTPRequest(method="GET", path=["/"], headers={})
@@ -329,7 +389,7 @@ class TcpHeader:
             if self.response is MISSING:
                 self.response = TcpHTTPResponse(version="1.1", status="200", reason="OK", headers={})
 
-@dataclasses.dataclass()
+@dataclasses.dataclass(**_SLOTS)
 class TcpStreamSettings:
     header: TcpHeader = dataclasses.field(default_factory=TcpHeader)
     """ tcp header """
@@ -341,7 +401,7 @@ class TcpStreamSettings:
         if isinstance(self.header, dict):
             self.header = TcpHeader(**self.header)
 
-@dataclasses.dataclass()
+@dataclasses.dataclass(**_SLOTS)
 class WsStreamSettings:
     path: str = "/"
     headers: typing.Dict[str, str] = dataclasses.field(default_factory=dict)
@@ -353,7 +413,7 @@ class KcpHeader(typing.TypedDict):
     type: typing.Literal["none", "srtp", "utp", "wechat-video", "dtls", "wireguard"]
     """ can be `none`, `srtp`, `utp`, `wechat-video`, `dtls`, and `wireguard` """
 
-@dataclasses.dataclass()
+@dataclasses.dataclass(**_SLOTS)
 class KcpStreamSettings:
     header: KcpHeader
     seed: str
@@ -368,7 +428,7 @@ class KcpStreamSettings:
 class SockoptHeader(typing.TypedDict):
     acceptProxyProtocol: bool
 
-@dataclasses.dataclass()
+@dataclasses.dataclass(**_SLOTS)
 class HTTPStreamSettings:
     path: str = "/"
     host: typing.List[str] = dataclasses.field(default_factory=list)
@@ -379,13 +439,13 @@ class QuicHeader(typing.TypedDict):
     type: typing.Literal["none", "srtp", "utp", "wechat-video", "dtls", "wireguard"]
     """ can be `none`, `srtp`, `utp`, `wechat-video`, `dtls`, and `wireguard` """
 
-@dataclasses.dataclass()
+@dataclasses.dataclass(**_SLOTS)
 class QuicStreamSettings:
     header: QuicHeader
     security: typing.Literal["none", "aes-128-gcm", "chacha20-poly1305"] = "none"
     key: str = ""
 
-@dataclasses.dataclass()
+@dataclasses.dataclass(**_SLOTS)
 class GrpcStreamSettings:
     serviceName: str
 
@@ -395,7 +455,15 @@ class GrpcStreamSettings:
     sockopt: SockoptHeader = dataclasses.field(default=MISSING, compare=False)
     """ Vaxilu and NidukaAkalanka not supported """
 
-@dataclasses.dataclass()
+_NETWORK_SETTINGS = {
+    "tcp": ("tcpSettings", TcpStreamSettings), "kcp": ("kcpSettings", KcpStreamSettings),
+    "ws": ("wsSettings", WsStreamSettings), "http": ("httpSettings", HTTPStreamSettings),
+    "quic": ("quicSettings", QuicStreamSettings), "grpc": ("grpcSettings", GrpcStreamSettings),
+}
+
+_SECURITY_SETTINGS = {"tls": "tlsSettings", "xtls": "xtlsSettings"}
+
+@dataclasses.dataclass(**_SLOTS)
 class StreamSettings:
     network: typing.Literal["tcp", "kcp", "ws", "http", "quic", "grpc"]
     """ stream network - `tcp`, `kcp`, `ws`, `http`, `quic`, `grpc` """
@@ -428,40 +496,27 @@ class StreamSettings:
     """ grpc settings is needed if used """
 
     def __post_init__(self):
-        if self.network == "tcp":
-            if isinstance(self.tcpSettings, dict):
-                self.tcpSettings = TcpStreamSettings(**self.tcpSettings)
-        
-        elif self.network == "kcp":
-            if isinstance(self.kcpSettings, dict):
-                self.kcpSettings = KcpStreamSettings(**self.kcpSettings)
-        
-        elif self.network == "ws":
-            if isinstance(self.wsSettings, dict):
-                self.wsSettings = WsStreamSettings(**self.wsSettings)
-        
-        elif self.network == "http":
-            if isinstance(self.httpSettings, dict):
-                self.httpSettings = HTTPStreamSettings(**self.httpSettings)
-        
-        elif self.network == "quic":
-            if isinstance(self.quicSettings, dict):
-                self.quicSettings = QuicStreamSettings(**self.quicSettings)
-
-        elif self.network == "grpc":
-            if isinstance(self.grpcSettings, dict):
-                self.grpcSettings = GrpcStreamSettings(**self.grpcSettings)
-        
-        if self.security == "tls":
-            if isinstance(self.tlsSettings, dict):
-                self.tlsSettings = TlsStreamSettings(**self.tlsSettings)
-        
-        if self.security == "xtls":
-            if isinstance(self.xtlsSettings, dict):
-                self.xtlsSettings = TlsStreamSettings(**self.xtlsSettings)
-
-@dataclasses.dataclass()
-class ClientStat:
+        # interned, so the builder table lookups and comparisons hit the identity fast path
+        if isinstance(self.network, str):
+            self.network = sys.intern(self.network)
+
+        if isinstance(self.security, str):
+            self.security = sys.intern(self.security)
+
+        entry = _NETWORK_SETTINGS.get(self.network)
+        if entry is not None:
+            key, settings_cls = entry
+            value = getattr(self, key)
+            if isinstance(value, dict):
+                setattr(self, key, settings_cls(**value))
+        
+        key = _SECURITY_SETTINGS.get(self.security)
+        if key is not None:
+            value = getattr(self, key)
+            if isinstance(value, dict):
+                setattr(self, key, TlsStreamSettings(**value))
+
+class ClientStat(typing.NamedTuple):
     id: int
     inboundId: int
     enable: bool
@@ -471,7 +526,244 @@ class ClientStat:
     expiryTime: int
     total: int
 
-@dataclasses.dataclass()
+    @classmethod
+    def _from_dict(cls, d: dict) -> "ClientStat":
+        return cls(
+            d["id"], d["inboundId"], d["enable"], d["email"], d["up"], d["down"], d["expiryTime"], d["total"]
+        )
+
+class ClientStatTable:
+    """
+    Column-oriented client stats.
+
+    Numeric columns are packed `array`s (8 bytes per value), so a large table takes
+    far less memory than a list of `ClientStat`. Use `row(i)` to get a `ClientStat` back.
+    """
+    __slots__ = ("id", "inboundId", "enable", "email", "up", "down", "expiryTime", "total")
+
+    def __init__(self, stats: typing.Iterable[typing.Union[ClientStat, dict]] = ()) -> None:
+        self.id = array("q")
+        self.inboundId = array("q")
+        self.enable = array("b")
+        self.email: typing.List[str] = []
+        self.up = array("q")
+        self.down = array("q")
+        self.expiryTime = array("q")
+        self.total = array("q")
+
+        for stat in stats:
+            self.append(stat)
+
+    def append(self, stat: typing.Union[ClientStat, dict]) -> None:
+        if isinstance(stat, dict):
+            stat = ClientStat._from_dict(stat)
+
+        self.id.append(stat.id)
+        self.inboundId.append(stat.inboundId)
+        self.enable.append(stat.enable)
+        self.email.append(stat.email)
+        self.up.append(stat.up)
+        self.down.append(stat.down)
+        self.expiryTime.append(stat.expiryTime)
+        self.total.append(stat.total)
+
+    def row(self, index: int) -> ClientStat:
+        return ClientStat(
+            self.id[index], self.inboundId[index], bool(self.enable[index]), self.email[index],
+            self.up[index], self.down[index], self.expiryTime[index], self.total[index]
+        )
+
+    def __len__(self) -> int:
+        return len(self.email)
+
+    def __iter__(self) -> typing.Iterator[ClientStat]:
+        return map(self.row, range(len(self.email)))
+
+    def __repr__(self) -> str:
+        return f"ClientStatTable(<{len(self.email)} clients>)"
+
+# Access link builders
+#
+# Each stream builder takes `(streamSettings, params)` and fills `params` in place;
+# the link methods pick one with a single dict lookup on `network` / `security`.
+
+def _tcp_http_params(request: TcpHTTPRequest, params: dict) -> None:
+    params["path"] = ",".join(request["path"])
+    host = request["headers"].get("host", None)
+    if host:
+        params["host"] = ",".join(host)
+
+def _ws_params(ss: StreamSettings, params: dict) -> None:
+    ws = ss.wsSettings
+    params["path"] = ws.path
+    host = ws.headers.get("host", None)
+    if host:
+        params["host"] = host
+
+def _http_params(ss: StreamSettings, params: dict) -> None:
+    http = ss.httpSettings
+    params["path"] = http.path
+    params["host"] = ",".join(http.host)
+
+# vmess (json object)
+
+def _vmess_tcp(ss: StreamSettings, obj: dict) -> None:
+    header = ss.tcpSettings.header
+    obj["type"] = header.type
+    if header.type == "http":
+        _tcp_http_params(header.request, obj)
+
+def _vmess_kcp(ss: StreamSettings, obj: dict) -> None:
+    kcp = ss.kcpSettings
+    obj["type"] = kcp.header["type"]
+    obj["seed"] = kcp.seed
+
+def _vmess_http(ss: StreamSettings, obj: dict) -> None:
+    obj["net"] = "h2"
+    _http_params(ss, obj)
+
+def _vmess_quic(ss: StreamSettings, obj: dict) -> None:
+    quic = ss.quicSettings
+    obj["type"] = quic.header["type"]
+    obj["host"] = quic.security
+    obj["path"] = quic.key
+
+def _vmess_grpc(ss: StreamSettings, obj: dict) -> None:
+    grpc = ss.grpcSettings
+    obj["path"] = grpc.serviceName
+    if grpc.multiMode is True:
+        obj["type"] = "multi"
+
+def _vmess_tls(ss: StreamSettings, obj: dict) -> None:
+    tls = ss.tlsSettings
+    if tls.serverName:
+        obj["add"] = tls.serverName
+    
+    info = _tls_info(tls)
+    if info.serverName:
+        obj["sni"] = info.serverName
+    
+    if info.fingerprint:
+        obj["fp"] = info.fingerprint
+
+    if info.allowInsecure:
+        obj["allowInsecure"] = info.allowInsecure
+
+    alpn = tls.alpn
+    if isinstance(alpn, list) and alpn:
+        obj["alpn"] = ",".join(alpn)
+
+_VMESS_STREAM_BUILDERS: typing.Dict[str, typing.Callable[[StreamSettings, dict], None]] = {
+    "tcp": _vmess_tcp,
+    "kcp": _vmess_kcp,
+    "ws": _ws_params,
+    "http": _vmess_http,
+    "quic": _vmess_quic,
+    "grpc": _vmess_grpc,
+}
+
+_VMESS_SECURITY_BUILDERS: typing.Dict[str, typing.Callable[[StreamSettings, dict], None]] = {
+    "tls": _vmess_tls,
+}
+
+# vless and trojan (query string)
+
+_quote_cached = functools.lru_cache(maxsize=256)(quote)
+
+_QS_SAFE = frozenset(string.ascii_letters + string.digits + "_.-~")
+
+def _fast_qs(params: dict) -> str:
+    # same output as urlencode(params), but skips quoting values that need none
+    parts = []
+    for key, value in params.items():
+        if value.__class__ is not str:
+            value = str(value)
+
+        parts.append(key + "=" + (value if _QS_SAFE.issuperset(value) else quote_plus(value)))
+
+    return "&".join(parts)
+
+def _query_tcp(ss: StreamSettings, params: dict) -> None:
+    header = ss.tcpSettings.header
+    if header.type == "http":
+        _tcp_http_params(header.request, params)
+        params["headerType"] = "http"
+
+def _query_kcp(ss: StreamSettings, params: dict) -> None:
+    kcp = ss.kcpSettings
+    params["headerType"] = kcp.header["type"]
+    params["seed"] = kcp.seed
+
+def _query_quic(ss: StreamSettings, params: dict) -> None:
+    quic = ss.quicSettings
+    params["headerType"] = quic.header["type"]
+    params["quicSecurity"] = quic.security
+    params["key"] = quic.key
+
+def _query_grpc(ss: StreamSettings, params: dict) -> None:
+    grpc = ss.grpcSettings
+    params["serviceName"] = grpc.serviceName
+    if grpc.multiMode is True:
+        params["mode"] = "multi"
+
+def _query_tls(ss: StreamSettings, params: dict, address: str) -> str:
+    params["security"] = "tls"
+
+    tls = ss.tlsSettings
+    info = _tls_info(tls)
+
+    if info is not _EMPTY_TLS_INFO:
+        params["fp"] = info.fingerprint
+
+    if info.allowInsecure:
+        params["allowInsecure"] = "1"
+    
+    if info.serverName:
+        params["sni"] = info.serverName
+    
+    if tls.alpn is not MISSING:
+        params["alpn"] = ",".join(tls.alpn)
+    
+    if tls.serverName:
+        address = tls.serverName
+    
+    return address
+
+def _query_xtls(ss: StreamSettings, params: dict, address: str) -> str:
+    params["security"] = "xtls"
+
+    tls = ss.xtlsSettings
+    info = _tls_info(tls)
+
+    if info.allowInsecure:
+        params["allowInsecure"] = "1"
+    
+    if info.serverName:
+        params["sni"] = info.serverName
+    
+    if tls.alpn is not MISSING:
+        params["alpn"] = ",".join(tls.alpn)
+    
+    if tls.serverName:
+        address = tls.serverName
+    
+    return address
+
+_QUERY_STREAM_BUILDERS: typing.Dict[str, typing.Callable[[StreamSettings, dict], None]] = {
+    "tcp": _query_tcp,
+    "kcp": _query_kcp,
+    "ws": _ws_params,
+    "http": _http_params,
+    "quic": _query_quic,
+    "grpc": _query_grpc,
+}
+
+_QUERY_SECURITY_BUILDERS: typing.Dict[str, typing.Callable[[StreamSettings, dict, str], str]] = {
+    "tls": _query_tls,
+    "xtls": _query_xtls,
+}
+
+@dataclasses.dataclass(**_SLOTS)
 class Inbound:
     remark: str
     """ inbound remark """
@@ -527,9 +819,12 @@ class Inbound:
     """ inbound tag, always like 'inbound-PORT' - you don't need to set it """
 
     def __post_init__(self):
+        if isinstance(self.protocol, str):
+            self.protocol = sys.intern(self.protocol)
+
         # settings
         if isinstance(self.settings, str):
-            self.settings = json.loads(self.settings)
+            self.settings = _loads(self.settings)
         
         if isinstance(self.settings, dict):
             self.settings = _PROTOCOLS[self.protocol](**self.settings)
@@ -537,7 +832,7 @@ class Inbound:
         # stream settings
         if isinstance(self.streamSettings, str):
             if self.streamSettings:
-                self.streamSettings = json.loads(self.streamSettings)
+                self.streamSettings = _loads(self.streamSettings)
         
         if isinstance(self.streamSettings, dict):
             self.streamSettings = StreamSettings(**self.streamSettings)
@@ -545,14 +840,15 @@ class Inbound:
         # sniffing
         if isinstance(self.sniffing, str):
             if self.sniffing:
-                self.sniffing = json.loads(self.sniffing)
+                self.sniffing = _loads(self.sniffing)
         
         if isinstance(self.sniffing, dict):
             self.sniffing = SniffingSettings(**self.sniffing)
 
         # client stats
-        if self.clientStats and self.clientStats is not MISSING and isinstance(self.clientStats[0], dict):
-            self.clientStats = list(ClientStat(**i) for i in self.clientStats) # type: ignore
+        stats = self.clientStats
+        if stats is not MISSING and stats and isinstance(stats[0], dict):
+            self.clientStats = [ClientStat._from_dict(i) for i in stats] # type: ignore
 
     def _vmess_access_link(self, address: str, remark: str = "", client_index: int = 0) -> str:
         if self.protocol != "vmess":
@@ -560,163 +856,69 @@ class Inbound:
                 f"cannot create vmess access link: invalid protocol error {self.protocol!r}"
             )
         
-        remark = (remark) or (self.settings.clients[client_index].email or self.remark)
+        ss = self.streamSettings
+        client = self.settings.clients[client_index]
+        remark = (remark) or (client.email or self.remark)
 
-        obj = dict(
-            v="2", ps=remark, add=address, port=self.port,
-            id=self.settings.clients[client_index].id, # type: ignore
-            net=self.streamSettings.network, # type: ignore
-            type="none", tls=self.streamSettings.security # type: ignore
-        )
+        obj = {
+            "v": "2", "ps": remark, "add": address, "port": self.port,
+            "id": client.id, # type: ignore
+            "net": ss.network, # type: ignore
+            "type": "none", "tls": ss.security # type: ignore
+        }
 
         # stream settings
-        network = self.streamSettings.network # type: ignore
-        if network == "tcp":
-            obj["type"] = self.streamSettings.tcpSettings.header.type
-
-            if (self.streamSettings.tcpSettings.header.type == "http"):
-                obj["path"] = ",".join(self.streamSettings.tcpSettings.header.request["path"])
-                host = self.streamSettings.tcpSettings.header.request["headers"].get("host", None)
-                if host:
-                    obj["host"] = ",".join(host)
-        
-        elif network == "kcp":
-            obj["type"] = self.streamSettings.kcpSettings.header["type"]
-            obj["seed"] = self.streamSettings.kcpSettings.seed
-        
-        elif network == "ws":
-            obj["path"] = self.streamSettings.wsSettings.path
-            host = self.streamSettings.wsSettings.headers.get("host", None)
-            if host:
-                obj["host"] = host
-        
-        elif network == "http":
-            obj["net"] = "h2"
-            obj["path"] = self.streamSettings.httpSettings.path
-            obj["host"] = ",".join(self.streamSettings.httpSettings.host)
-        
-        elif network == "quic":
-            obj["type"] = self.streamSettings.quicSettings.header["type"]
-            obj["host"] = self.streamSettings.quicSettings.security
-            obj["path"] = self.streamSettings.quicSettings.key
-        
-        elif network == "grpc":
-            obj["path"] = self.streamSettings.grpcSettings.serviceName
-            if self.streamSettings.grpcSettings.multiMode is True:
-                obj["type"] = "multi"
+        builder = _VMESS_STREAM_BUILDERS.get(ss.network) # type: ignore
+        if builder is not None:
+            builder(ss, obj)
         
         # tls settings
-        if self.streamSettings.security == "tls":
-            if self.streamSettings.tlsSettings.serverName:
-                obj["add"] = self.streamSettings.tlsSettings.serverName
-            
-            if isinstance(self.streamSettings.tlsSettings.settings, TlsStreamSettingsInfo):
-                if self.streamSettings.tlsSettings.settings.serverName:
-                    obj["sni"] = self.streamSettings.tlsSettings.settings.serverName
-                
-                if self.streamSettings.tlsSettings.settings.fingerprint:
-                    obj["fp"] = self.streamSettings.tlsSettings.settings.fingerprint
-            
-                if self.streamSettings.tlsSettings.settings.allowInsecure:
-                    obj["allowInsecure"] = self.streamSettings.tlsSettings.settings.allowInsecure
-
-            if isinstance(self.streamSettings.tlsSettings.alpn, list) and self.streamSettings.tlsSettings.alpn:
-                obj["alpn"] = ",".join(self.streamSettings.tlsSettings.alpn)
+        builder = _VMESS_SECURITY_BUILDERS.get(ss.security) # type: ignore
+        if builder is not None:
+            builder(ss, obj)
         
-        return (b"vmess://" + base64.b64encode(json.dumps(obj, indent=4).encode())).decode()
+        return "vmess://" + base64.b64encode(_dumpb(obj)).decode()
 
-    def _vless_access_link(self, address: str, remark: str = "", client_index: int = 0) -> str:
-        if self.protocol != "vless":
-            raise ValueError(
-                f"cannot create vless access link: invalid protocol error {self.protocol!r}"
-            )
-        
-        remark = (remark) or (self.settings.clients[client_index].email or self.remark)
+    def _query_link_parts(self, address: str, remark: str, client_index: int, flow_securities: tuple):
+        """
+        Shared part of vless and trojan links; returns `(client, address, query, remark)`.
+
+        - `flow_securities`: securities for which the client flow is added (tcp network only)
+        """
+        ss = self.streamSettings
+        network = ss.network
+        client = self.settings.clients[client_index]
+        remark = (remark) or (client.email or self.remark)
         
-        params = {"type": self.streamSettings.network}
+        params = {"type": network}
         
         # stream
-        if self.streamSettings.network == "tcp":
-            if self.streamSettings.tcpSettings.header.type == "http":
-                params["path"] = ",".join(self.streamSettings.tcpSettings.header.request["path"])
-                host = self.streamSettings.tcpSettings.header.request["headers"].get("host", None)
-                if host:
-                    params["host"] = ",".join(host)
-
-                params["headerType"] = "http"
-        
-        elif self.streamSettings.network == "kcp":
-            params["headerType"] = self.streamSettings.kcpSettings.header["type"]
-            params["seed"] = self.streamSettings.kcpSettings.seed
-        
-        elif self.streamSettings.network == "ws":
-            params["path"] = self.streamSettings.wsSettings.path
-            host = self.streamSettings.wsSettings.headers.get("host", None)
-            if host:
-                params["host"] = host
-        
-        elif self.streamSettings.network == "http":
-            params["path"] = self.streamSettings.httpSettings.path
-            params["host"] = ",".join(self.streamSettings.httpSettings.host)
-        
-        elif self.streamSettings.network == "quic":
-            params["headerType"] = self.streamSettings.quicSettings.header["type"]
-            params["quicSecurity"] = self.streamSettings.quicSettings.security
-            params["key"] = self.streamSettings.quicSettings.key
-        
-        elif self.streamSettings.network == "grpc":
-            params["serviceName"] = self.streamSettings.grpcSettings.serviceName
-            if self.streamSettings.grpcSettings.multiMode is True:
-                params["mode"] = "multi"
+        builder = _QUERY_STREAM_BUILDERS.get(network)
+        if builder is not None:
+            builder(ss, params)
         
         # tls
-        if self.streamSettings.security == "tls":
-            params["security"] = "tls"
-
-            if isinstance(self.streamSettings.tlsSettings.settings, TlsStreamSettingsInfo):
-                params["fp"] = self.streamSettings.tlsSettings.settings.fingerprint
+        builder = _QUERY_SECURITY_BUILDERS.get(ss.security)
+        if builder is not None:
+            address = builder(ss, params, address)
 
-                if self.streamSettings.tlsSettings.settings.allowInsecure:
-                    params["allowInsecure"] = "1"
-                
-                if self.streamSettings.tlsSettings.settings.serverName:
-                    params["sni"] = self.streamSettings.tlsSettings.settings.serverName
-            
-            if self.streamSettings.tlsSettings.alpn is not MISSING:
-                params["alpn"] = ",".join(self.streamSettings.tlsSettings.alpn)
-            
-            if self.streamSettings.tlsSettings.serverName:
-                address = self.streamSettings.tlsSettings.serverName
-            
-            # client flow
-            if (self.streamSettings.network == "tcp") and (self.settings.clients[client_index].flow):
-                params["flow"] = self.settings.clients[client_index].flow
-        
-        elif self.streamSettings.security == "xtls":
-            params["security"] = "xtls"
-
-            if isinstance(self.streamSettings.xtlsSettings.settings, TlsStreamSettingsInfo):
-                if self.streamSettings.xtlsSettings.settings.allowInsecure:
-                    params["allowInsecure"] = "1"
-                
-                if self.streamSettings.xtlsSettings.settings.serverName:
-                    params["sni"] = self.streamSettings.xtlsSettings.settings.serverName
-            
-            if self.streamSettings.xtlsSettings.alpn is not MISSING:
-                params["alpn"] = ",".join(self.streamSettings.xtlsSettings.alpn)
-            
-            if self.streamSettings.xtlsSettings.serverName:
-                address = self.streamSettings.xtlsSettings.serverName
-            
             # client flow
-            if (self.streamSettings.network == "tcp") and (self.settings.clients[client_index].flow):
-                params["flow"] = self.settings.clients[client_index].flow
+            if (network == "tcp") and (ss.security in flow_securities) and (client.flow):
+                params["flow"] = client.flow
 
         else:
             params["security"] = "none"
         
-        return "vless://" + self.settings.clients[client_index].id + "@" + address + ":" + str(self.port) \
-                + "?" + urlencode(params) + "#" + quote(remark)
+        return client, address, _fast_qs(params), _quote_cached(remark)
+
+    def _vless_access_link(self, address: str, remark: str = "", client_index: int = 0) -> str:
+        if self.protocol != "vless":
+            raise ValueError(
+                f"cannot create vless access link: invalid protocol error {self.protocol!r}"
+            )
+        
+        client, address, query, remark = self._query_link_parts(address, remark, client_index, ("tls", "xtls"))
+        return f"vless://{client.id}@{address}:{self.port}?{query}#{remark}"
     
     def _trojan_access_link(self, address: str, remark: str = "", client_index: int = 0) -> str:
         if self.protocol != "trojan":
@@ -724,118 +926,69 @@ class Inbound:
                 f"cannot create trojan access link: invalid protocol error {self.protocol!r}"
             )
         
-        remark = (remark) or (self.settings.clients[client_index].email or self.remark)
-        
-        params = {"type": self.streamSettings.network}
-
-        # stream
-        if self.streamSettings.network == "tcp":
-            if self.streamSettings.tcpSettings.header.type == "http":
-                params["path"] = ",".join(self.streamSettings.tcpSettings.header.request["path"])
-                host = self.streamSettings.tcpSettings.header.request["headers"].get("host", None)
-                if host:
-                    params["host"] = ",".join(host)
-
-                params["headerType"] = "http"
-        
-        elif self.streamSettings.network == "kcp":
-            params["headerType"] = self.streamSettings.kcpSettings.header["type"]
-            params["seed"] = self.streamSettings.kcpSettings.seed
-        
-        elif self.streamSettings.network == "ws":
-            params["path"] = self.streamSettings.wsSettings.path
-            host = self.streamSettings.wsSettings.headers.get("host", None)
-            if host:
-                params["host"] = host
-        
-        elif self.streamSettings.network == "http":
-            params["path"] = self.streamSettings.httpSettings.path
-            params["host"] = ",".join(self.streamSettings.httpSettings.host)
-        
-        elif self.streamSettings.network == "quic":
-            params["headerType"] = self.streamSettings.quicSettings.header["type"]
-            params["quicSecurity"] = self.streamSettings.quicSettings.security
-            params["key"] = self.streamSettings.quicSettings.key
-        
-        elif self.streamSettings.network == "grpc":
-            params["serviceName"] = self.streamSettings.grpcSettings.serviceName
-            if self.streamSettings.grpcSettings.multiMode is True:
-                params["mode"] = "multi"
-        
-        # tls
-        if self.streamSettings.security == "tls":
-            params["security"] = "tls"
+        client, address, query, remark = self._query_link_parts(address, remark, client_index, ("xtls",))
+        return f"trojan://{client.password}@{address}:{self.port}?{query}#{remark}"
 
-            if isinstance(self.streamSettings.tlsSettings.settings, TlsStreamSettingsInfo):
-                params["fp"] = self.streamSettings.tlsSettings.settings.fingerprint
+    def client_stats_table(self) -> ClientStatTable:
+        """
+        Returns `clientStats` as a `ClientStatTable` (empty if the panel sent none).
+        """
+        stats = self.clientStats
+        return ClientStatTable(stats if stats is not MISSING else ())
 
-                if self.streamSettings.tlsSettings.settings.allowInsecure:
-                    params["allowInsecure"] = "1"
-                
-                if self.streamSettings.tlsSettings.settings.serverName:
-                    params["sni"] = self.streamSettings.tlsSettings.settings.serverName
-            
-            if self.streamSettings.tlsSettings.alpn is not MISSING:
-                params["alpn"] = ",".join(self.streamSettings.tlsSettings.alpn)
-            
-            if self.streamSettings.tlsSettings.serverName:
-                address = self.streamSettings.tlsSettings.serverName
-        
-        elif self.streamSettings.security == "xtls":
-            params["security"] = "xtls"
-
-            if isinstance(self.streamSettings.xtlsSettings.settings, TlsStreamSettingsInfo):
-                if self.streamSettings.xtlsSettings.settings.allowInsecure:
-                    params["allowInsecure"] = "1"
-                
-                if self.streamSettings.xtlsSettings.settings.serverName:
-                    params["sni"] = self.streamSettings.xtlsSettings.settings.serverName
-            
-            if self.streamSettings.xtlsSettings.alpn is not MISSING:
-                params["alpn"] = ",".join(self.streamSettings.xtlsSettings.alpn)
-            
-            if self.streamSettings.xtlsSettings.serverName:
-                address = self.streamSettings.xtlsSettings.serverName
-            
-            # client flow
-            if (self.streamSettings.network == "tcp") and (self.settings.clients[client_index].flow):
-                params["flow"] = self.settings.clients[client_index].flow
-
-        else:
-            params["security"] = "none"
+    def generate_access_link(self, address: str, remark: str = "", client_index: int = 0) -> str:
+        builder = _LINK_BUILDERS.get(self.protocol)
+        if builder is None:
+            return ""
 
-        return "trojan://" + self.settings.clients[client_index].password + "@" + address + ":" + str(self.port) \
-                + "?" + urlencode(params) + "#" + quote(remark)
+        return builder(self, address, remark, client_index)
 
-    def generate_access_link(self, address: str, remark: str = "", client_index: int = 0) -> str:
-        if self.protocol == "vmess":
-            return self._vmess_access_link(address, remark, client_index)
+_LINK_BUILDERS: typing.Dict[str, typing.Callable[[Inbound, str, str, int], str]] = {
+    "vmess": Inbound._vmess_access_link,
+    "vless": Inbound._vless_access_link,
+    "trojan": Inbound._trojan_access_link,
+}
 
-        if self.protocol == "vless":
-            return self._vless_access_link(address, remark, client_index)
+_LEAF_TYPES = frozenset((int, str, bool, float, type(None), bytes))
 
-        if self.protocol == "trojan":
-            return self._trojan_access_link(address, remark, client_index)
+_INIT_FIELDS: typing.Dict[type, typing.Tuple[typing.Tuple[str, typing.Any], ...]] = {}
 
-        return ""
+def _init_fields(cls: type) -> typing.Tuple[typing.Tuple[str, typing.Any], ...]:
+    # (name, type) of the fields sent to the panel
+    try:
+        return _INIT_FIELDS[cls]
+    except KeyError:
+        fields = _INIT_FIELDS[cls] = tuple((f.name, f.type) for f in dataclasses.fields(cls) if f.init)
+        return fields
 
 def _asdict_inner(obj, dict_factory, fill_fields: bool = False) -> dict:
-    if hasattr(type(obj), '__dataclass_fields__'):
+    cls = obj.__class__
+    if cls in _LEAF_TYPES or obj is MISSING:
+        # immutable, no need to copy
+        return obj
+
+    if hasattr(cls, '__dataclass_fields__'):
         result = []
-        for f in dataclasses.fields(obj):
-            value = _asdict_inner(getattr(obj, f.name), dict_factory, fill_fields)
+        for name, ftype in _init_fields(cls):
+            value = _asdict_inner(getattr(obj, name), dict_factory, fill_fields)
             if value is not MISSING:
-                result.append((f.name, value))
+                result.append((name, value))
             elif fill_fields:
-                result.append((f.name, f.type()))
+                result.append((name, ftype()))
 
         return dict_factory(result)
     
     elif isinstance(obj, tuple) and hasattr(obj, '_fields'):
-        return type(obj)(*[_asdict_inner(v, dict_factory, fill_fields) for v in obj]) # type: ignore
+        # namedtuples (ClientStat) are records on the panel side
+        return dict_factory(
+            (name, _asdict_inner(v, dict_factory, fill_fields)) for name, v in zip(obj._fields, obj) # type: ignore
+        )
     
-    elif isinstance(obj, (list, tuple)):
-        return type(obj)(_asdict_inner(v, dict_factory, fill_fields) for v in obj) # type: ignore
+    elif isinstance(obj, list):
+        return [_asdict_inner(v, dict_factory, fill_fields) for v in obj] # type: ignore
+
+    elif isinstance(obj, tuple):
+        return type(obj)([_asdict_inner(v, dict_factory, fill_fields) for v in obj]) # type: ignore
     
     elif isinstance(obj, dict):
         return type(obj)((_asdict_inner(k, dict_factory, fill_fields),
@@ -846,7 +999,7 @@ def _asdict_inner(obj, dict_factory, fill_fields: bool = False) -> dict:
 
 def _cast_to_dict(obj, fill_fields: bool = False) -> dict:
     data = _asdict_inner(obj, dict, fill_fields)
-    data["settings"] = json.dumps(data["settings"])
-    data["streamSettings"] = json.dumps(data["streamSettings"])
-    data["sniffing"] = json.dumps(data["sniffing"])
+    data["settings"] = _dumps(data["settings"])
+    data["streamSettings"] = _dumps(data["streamSettings"])
+    data["sniffing"] = _dumps(data["sniffing"])
     return data
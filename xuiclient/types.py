@@ -1,28 +1,108 @@
+from __future__ import annotations
+
 import dataclasses
 import typing
+import sys
+
+# slotted dataclasses have no per-instance __dict__ (python 3.10+)
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+# byte sizes for traffic limits (e.g. `totalGB=10 * GIGABYTE`)
+BYTE, KILOBYTE, MEGABYTE, GIGABYTE = 1, 1 << 10, 1 << 20, 1 << 30
+
+class _ItemAccess:
+    """
+    Read-only mapping access (`status.mem["current"]`, `"current" in status.mem`,
+    `dict(status.mem)`) - these sub-objects used to be plain dicts.
+    """
+    __slots__ = ()
+
+    __dataclass_fields__: typing.ClassVar[dict[str, dataclasses.Field]]
+
+    def __getitem__(self, key: str):
+        if key not in self.__dataclass_fields__:
+            raise KeyError(key)
+
+        return getattr(self, key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.__dataclass_fields__
+
+    def __iter__(self):
+        return iter(self.__dataclass_fields__)
+
+    def __len__(self) -> int:
+        return len(self.__dataclass_fields__)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return self.__dataclass_fields__.keys()
+
+    def values(self):
+        return [getattr(self, k) for k in self.__dataclass_fields__]
+
+    def items(self):
+        return [(k, getattr(self, k)) for k in self.__dataclass_fields__]
 
-class _StatusStat(typing.TypedDict):
+@dataclasses.dataclass(frozen=True, **_SLOTS)
+class _StatusStat(_ItemAccess):
     current: int
     total: int
 
-class _StatusXRayState(typing.TypedDict):
+    percentage: float = dataclasses.field(default=0.0, init=False, compare=False)
+    """ `current` as a percentage of `total` (0 when total is 0) """
+
+    def __post_init__(self):
+        if self.total:
+            object.__setattr__(self, "percentage", self.current / self.total * 100.0)
+
+    @classmethod
+    def _from_dict(cls, d: dict) -> "_StatusStat":
+        return cls(d["current"], d["total"])
+
+@dataclasses.dataclass(frozen=True, **_SLOTS)
+class _StatusXRayState(_ItemAccess):
     state: str
     errorMsg: str
     version: str
 
-class _StatusNetIO(typing.TypedDict):
+    @classmethod
+    def _from_dict(cls, d: dict) -> "_StatusXRayState":
+        return cls(d["state"], d.get("errorMsg", ""), d.get("version", ""))
+
+@dataclasses.dataclass(frozen=True, **_SLOTS)
+class _StatusNetIO(_ItemAccess):
     up: int
     down: int
 
-class _StatusNetTraffic(typing.TypedDict):
+    @classmethod
+    def _from_dict(cls, d: dict) -> "_StatusNetIO":
+        return cls(d["up"], d["down"])
+
+@dataclasses.dataclass(frozen=True, **_SLOTS)
+class _StatusNetTraffic(_ItemAccess):
     sent: int
     recv: int
 
-class _PublicIP(typing.TypedDict):
-    ipv4: str
-    ipv6: str
+    @classmethod
+    def _from_dict(cls, d: dict) -> "_StatusNetTraffic":
+        return cls(d["sent"], d["recv"])
+
+@dataclasses.dataclass(frozen=True, **_SLOTS)
+class _PublicIP(_ItemAccess):
+    ipv4: str = ""
+    ipv6: str = ""
+
+    @classmethod
+    def _from_dict(cls, d: dict) -> "_PublicIP":
+        return cls(d.get("ipv4", ""), d.get("ipv6", ""))
 
-@dataclasses.dataclass()
+@dataclasses.dataclass(**_SLOTS)
 class ServerStatusResponse:
     cpu: float
     mem: _StatusStat
@@ -30,7 +110,7 @@ class ServerStatusResponse:
     disk: _StatusStat
     xray: _StatusXRayState
     uptime: int
-    loads: typing.List[float]
+    loads: list[float]
     tcpCount: int
     udpCount: int
     netIO: _StatusNetIO
@@ -42,10 +122,33 @@ class ServerStatusResponse:
     cpuSpeedMhz: int = 0
     """ Vaxilu and NidukaAkalanka not supported """
 
-    publicIP: _PublicIP = dataclasses.field(default_factory=lambda: _PublicIP(ipv4="", ipv6=""))
+    publicIP: _PublicIP = dataclasses.field(default_factory=_PublicIP)
     """ Vaxilu and NidukaAkalanka not supported """
 
-@dataclasses.dataclass()
+    def __post_init__(self):
+        # the panel sends the sub-objects as json objects
+        if type(self.mem) is dict:
+            self.mem = _StatusStat._from_dict(self.mem)
+
+        if type(self.swap) is dict:
+            self.swap = _StatusStat._from_dict(self.swap)
+
+        if type(self.disk) is dict:
+            self.disk = _StatusStat._from_dict(self.disk)
+
+        if type(self.xray) is dict:
+            self.xray = _StatusXRayState._from_dict(self.xray)
+
+        if type(self.netIO) is dict:
+            self.netIO = _StatusNetIO._from_dict(self.netIO)
+
+        if type(self.netTraffic) is dict:
+            self.netTraffic = _StatusNetTraffic._from_dict(self.netTraffic)
+
+        if type(self.publicIP) is dict:
+            self.publicIP = _PublicIP._from_dict(self.publicIP)
+
+@dataclasses.dataclass(**_SLOTS)
 class SettingsResponse:
     webPort: int
     xrayTemplateConfig: str
@@ -64,7 +167,7 @@ class SettingsResponse:
     tgBotChatId: int = 0
     """ Vaxilu not supported """
 
-    tgRunTime: typing.Union[int, str] = 0
+    tgRunTime: int | str = 0
     """
     Vaxilu not supported.
 
@@ -124,8 +227,11 @@ class SettingsResponse:
     """ Vaxilu and NidukaAkalanka not supported """
 
     def __post_init__(self):
-        if isinstance(self.tgBotChatId, str):
-            self.tgBotChatId = int(self.tgBotChatId or '0')
+        chat_id = self.tgBotChatId
+        if type(chat_id) is str:
+            self.tgBotChatId = int(chat_id) if chat_id else 0
         
-        if isinstance(self.tgRunTime, str) and self.tgRunTime.isdigit():
-            self.tgRunTime = int(self.tgRunTime or '0')
+        # only numeric strings; Sanaei sends a cron-like spec ('@daily')
+        run_time = self.tgRunTime
+        if type(run_time) is str and run_time.isdigit():
+            self.tgRunTime = int(run_time)